@@ -3,95 +3,170 @@ Script de Transcripción Automática de Videos de YouTube
 ========================================================
 
 Descarga videos de YouTube, extrae el audio, y genera transcripciones
-en español usando el modelo Whisper de OpenAI.
+en español usando el modelo Whisper de OpenAI (vía faster-whisper).
 
 Uso:
     - Con CSV: python3 script.py videos.csv
     - Manual:  python3 script.py
+    - Caché:   python3 script.py videos.csv --cache
+    - Modelo:  python3 script.py videos.csv --modelo large-v3-turbo
 
 Requisitos:
-    - yt-dlp, whisper, torch, pandas, python-docx, ffmpeg
+    - yt-dlp, faster-whisper, torch, pandas, python-docx, ffmpeg
 """
 
 import yt_dlp
 import subprocess
-import whisper
 import sys
+import argparse
+import hashlib
 import pandas as pd
 import os
+import psutil
 import torch
+import ctranslate2
 from docx import Document
+from docx.oxml import parse_xml
+from docx.oxml.ns import nsdecls
+from faster_whisper import BatchedInferencePipeline, WhisperModel
 import re
+import numpy as np
+import orjson
+import queue
+import threading
+import tempfile
+from collections import namedtuple
+from itertools import islice
+from concurrent.futures import ThreadPoolExecutor
+from xml.sax.saxutils import escape
+
+
+SAMPLE_RATE = 16000
+# Hilos intra-op de CTranslate2: uno por núcleo físico, sin hyperthreads
+CPU_THREADS = psutil.cpu_count(logical=False) or os.cpu_count()
+TARGET_RMS = 0.1  # ~-20 dBFS
+PREFETCH = 2  # Videos con audio en memoria a la vez, el que se transcribe incluido
+BATCH_SIZE = {"cuda": 16, "cpu": 4}  # Ventanas de 30 s por forward del encoder
+DOCX_LOTE = 100  # Segmentos por fragmento XML insertado en el .docx
+PROGRESO = 100  # Segmentos transcritos entre mensajes de progreso
+YOUTUBE_URL = r'(https?://)?((www|m|music)\.)?(youtube\.com|youtu\.be)/'
+CACHE_DIR = os.path.expanduser("~/.cache/youtube_transcriptor")
+
+# Filas pendientes de escribir en el log (ver registro / guardar_registro)
+_rows = []
+
+# Segmento transcrito reconstruido desde la caché (mismos campos que Segment de faster-whisper)
+Segmento = namedtuple("Segmento", ["start", "end", "text"])
 
 
 def main():
     """
     Función principal que coordina el proceso de transcripción.
     """
-    if len(sys.argv) == 2:
-        videos = extract_url(sys.argv[1])
+    parser = argparse.ArgumentParser(description="Transcribe videos de YouTube con Whisper")
+    parser.add_argument("csv", nargs="?", help="CSV con una columna 'url'")
+    parser.add_argument("--cache", action="store_true",
+                        help="Reutiliza transcripciones previas del mismo audio")
+    parser.add_argument("--modelo", default="medium",
+                        help="Checkpoint de faster-whisper o carpeta CTranslate2 "
+                             "(p. ej. large-v3-turbo: 4 capas de decoder, multilingüe)")
+    args = parser.parse_args()
+
+    if args.csv:
+        videos = extract_url(args.csv)
     else:
-        videos = [input("Enter the video URL: ")]
+        videos = [input("Enter the video URL: ").strip()]
+        if not re.match(YOUTUBE_URL, videos[0]):
+            print(f"⚠ La URL no parece de YouTube, se intentará igual: {videos[0]}")
     
     log_file = "transcriptions_log.csv"
 
     device = get_device()
+    compute_type = get_compute_type(device)
     
-    print("\n📦 Cargando modelo Whisper 'medium'...")
-    model = whisper.load_model("medium", device=device)
+    print(f"\n📦 Cargando modelo Whisper '{args.modelo}'...")
+    batch_size = BATCH_SIZE[device]
+    model = load_model(args.modelo, device, compute_type, batch_size)
     print("✓ Modelo cargado\n")
 
     # Contadores para resumen final
     total_videos = len(videos)
     exitosos = 0
     fallidos = 0
+
+    # Descargas en segundo plano: la red trabaja mientras el modelo transcribe.
+    # Cada video ocupa un cupo desde que se envía al pool hasta que termina aquí.
+    cola = queue.Queue()
+    cupos = threading.Semaphore(PREFETCH)
+    threading.Thread(target=prefetch, args=(videos, cola, cupos), daemon=True).start()
     
-    for idx, url in enumerate(videos, 1):
-        # Inicializar variables para limpieza segura
-        input_file = None
-        output_file = None
-        
-        # Indicador de progreso
-        print("=" * 70)
-        print(f"📹 VIDEO {idx}/{total_videos}")
-        print(f"🔗 {url}")
-        print("=" * 70)
-        
-        try:
-            # Descargar
-            print(f"\n[{idx}/{total_videos}] Paso 1/4: Descargando audio...")
-            info = download_video(url)
-            print(f"✓ Descargado: {info['title'][:50]}...")
-            
-            # Convertir
-            print(f"[{idx}/{total_videos}] Paso 2/4: Convirtiendo a WAV...")
-            input_file, output_file = convert_to_wav(info)
-            print(f"✓ Convertido")
-            
-            # Transcribir
-            print(f"[{idx}/{total_videos}] Paso 3/4: Transcribiendo...")
-            result = model.transcribe(output_file, language="es", fp16=False)
-            print(f"✓ Transcripción completada ({len(result['text'])} caracteres)")
-            
-            # Guardar
-            print(f"[{idx}/{total_videos}] Paso 4/4: Guardando documento...")
-            safe_title = re.sub(r'[<>:"/\\|?*]', '_', info['title'])
-            word(result, safe_title + ".docx")
-            
-            # Registrar éxito
-            registro(info, url, log_file)
-            exitosos += 1
-            
-            print(f"\n✅ VIDEO {idx}/{total_videos} COMPLETADO\n")
+    try:
+        for idx, url in enumerate(videos, 1):
+            futuro = cola.get()
             
-        except Exception as e:
-            print(f"\n❌ ERROR en video {idx}/{total_videos}: {str(e)}\n")
-            registro(e, url, log_file)
-            fallidos += 1
+            # Indicador de progreso
+            print("=" * 70)
+            print(f"📹 VIDEO {idx}/{total_videos}")
+            print(f"🔗 {url}")
+            print("=" * 70)
             
-        finally:
-            # Limpieza garantizada
-            clean(input_file, output_file)
+            try:
+                # Descargar y decodificar (ya en curso en segundo plano)
+                print(f"\n[{idx}/{total_videos}] Paso 1/3: Descargando y decodificando audio...")
+                info, audio = futuro.result()
+                snapshot_file = snapshot_path(info)
+                
+                if audio is None:
+                    # Una ejecución anterior transcribió el video pero no llegó a guardar el .docx
+                    print(f"✓ Transcripción previa encontrada: {snapshot_file}")
+                else:
+                    print(f"✓ Descargado: {info['title'][:50]}... ({len(audio) / SAMPLE_RATE:.0f} s)")
+                    
+                    # Transcribir
+                    print(f"[{idx}/{total_videos}] Paso 2/3: Transcribiendo...")
+                    cache_file = cache_path(audio, args.modelo) if args.cache else None
+                    if cache_file and os.path.exists(cache_file):
+                        segments = load_cache(cache_file)
+                        print("✓ Transcripción recuperada de caché")
+                    else:
+                        segments, _ = model.transcribe(
+                            audio, language="es", beam_size=5, vad_filter=True, batch_size=batch_size
+                        )
+                        if cache_file:
+                            segments = cache_segments(segments, cache_file)
+                    
+                    # Persistir antes de generar el .docx: un error ahí no obliga a transcribir de nuevo
+                    save_snapshot(segments, snapshot_file)
+                    print("✓ Transcripción completada")
+                
+                # Guardar
+                print(f"[{idx}/{total_videos}] Paso 3/3: Guardando documento...")
+                caracteres = word(
+                    load_snapshot(snapshot_file),
+                    sanitize_title(info['title']) + ".docx",
+                    duracion=info.get('duration'),
+                )
+                print(f"✓ Documento generado ({caracteres} caracteres)")
+                os.remove(snapshot_file)
+                
+                # Registrar éxito
+                registro(info, url)
+                exitosos += 1
+                
+                print(f"\n✅ VIDEO {idx}/{total_videos} COMPLETADO\n")
+                
+            except Exception as e:
+                print(f"\n❌ ERROR en video {idx}/{total_videos}: {str(e)}\n")
+                registro(e, url)
+                fallidos += 1
+                
+            finally:
+                # Soltar el audio antes de liberar el cupo para el siguiente video
+                futuro = audio = None
+                cupos.release()
+    finally:
+        # Un único append al log, aunque el lote se interrumpa
+        guardar_registro(log_file)
     
     # Resumen final
     print("\n" + "=" * 70)
@@ -103,6 +178,20 @@ def main():
     print("=" * 70 + "\n")
 
 
+def warmup(model, batch_size):
+    """
+    Ejecuta una transcripción sobre 1 s de silencio para inicializar kernels
+    y la caché del allocator antes del primer video.
+    """
+    silencio = np.zeros(SAMPLE_RATE, dtype=np.float32)
+    # transcribe() es perezoso: hay que consumir el generador para que decodifique
+    segments, _ = model.transcribe(
+        silencio, language="es", vad_filter=False, batch_size=batch_size
+    )
+    for _ in segments:
+        pass
+
+
 def extract_url(csv):
     """Extrae URLs desde un archivo CSV"""
     if not csv.endswith('.csv'):
@@ -110,15 +199,24 @@ def extract_url(csv):
     if not os.path.exists(csv):
         raise FileNotFoundError(f"No se encontró el archivo: {csv}")
     
-    df = pd.read_csv(csv) 
+    # Solo se parsea la columna 'url'
+    df = pd.read_csv(csv, usecols=lambda columna: columna == 'url', dtype='string')
     
     if 'url' not in df.columns:
         raise ValueError("El archivo CSV no contiene una columna 'url'.")
     
-    urls = []
-    for link in df['url'].tolist():
-        if pd.notna(link) and str(link).strip():
-            urls.append(link.strip())
+    links = df['url'].dropna().str.strip()
+    links = links[links.str.len() > 0]
+    
+    # Solo aviso: yt-dlp también admite otros sitios
+    for link in links[~links.str.match(YOUTUBE_URL)]:
+        print(f"⚠ La URL no parece de YouTube, se intentará igual: {link}")
+    
+    # Sin duplicados: cada URL se descarga y transcribe una sola vez
+    urls = links.drop_duplicates().tolist()
+    duplicados = len(links) - len(urls)
+    if duplicados:
+        print(f"⚠ Se omitieron {duplicados} URL(s) duplicada(s)")
     
     if not urls:
         raise ValueError("No se encontraron URLs válidas en el CSV.")
@@ -136,116 +234,348 @@ def get_device():
     else:
         device = "cpu"
         print("⚠ No se detectó GPU, usando CPU")
+        print(f"  Hilos de cómputo: {CPU_THREADS} (núcleos físicos)")
     return device
 
 
-def download_video(url):
-    """Descarga el audio de un video de YouTube"""
+def prefetch(videos, cola, cupos):
+    """
+    Productor: encola un Future por video, en el mismo orden que `videos`.
+    
+    Antes de enviar cada video toma un cupo de `cupos`, que el hilo principal
+    libera al terminar con él: así nunca hay más de PREFETCH audios
+    decodificados en memoria. Los errores viajan dentro del Future y se
+    registran en el hilo principal.
+    """
+    with ThreadPoolExecutor(max_workers=PREFETCH) as pool:
+        for url in videos:
+            cupos.acquire()
+            cola.put(pool.submit(prepare_video, url))
+
+
+def prepare_video(url):
+    """
+    Obtiene los metadatos de un video y decodifica su audio en memoria.
+    
+    Si ya existe una transcripción guardada por save_snapshot(), no descarga
+    el audio y devuelve None en su lugar.
+    """
+    info = fetch_info(url)
+    if os.path.exists(snapshot_path(info)):
+        return info, None
+    audio = decode_audio(url)
+    return info, audio
+
+
+def get_compute_type(device):
+    """
+    Elige el tipo de cómputo INT8 más rápido que soporta el dispositivo.
+    
+    En GPU los pesos INT8 se combinan con activaciones FP16; en CPU se usa
+    INT8 con activaciones FP32 (CTranslate2 no tiene GEMMs BF16 en CPU).
+    """
+    if device == "cpu":
+        preferidos = ["int8"]
+    else:
+        preferidos = ["int8_float16", "int8"]
+    
+    soportados = ctranslate2.get_supported_compute_types(device)
+    compute_type = next((c for c in preferidos if c in soportados), "default")
+    print(f"  Tipo de cómputo: {compute_type}")
+    return compute_type
+
+
+def load_model(modelo, device, compute_type, batch_size):
+    """
+    Carga un modelo Whisper en CTranslate2 con pesos INT8 (menos ancho de
+    banda de memoria y GEMMs cuantizados) y lo devuelve ya calentado, dentro
+    de un BatchedInferencePipeline que agrupa las ventanas de 30 s (cortadas
+    por VAD) de cada audio en lotes.
+    
+    `modelo` es un nombre de faster-whisper ("medium", "large-v3-turbo", ...)
+    o la carpeta de un modelo convertido con ct2-transformers-converter.
+    
+    En GPUs Ampere o posteriores intenta activar FlashAttention, que evita
+    materializar la matriz de atención completa del encoder.
+    """
+    kwargs = dict(
+        device=device,
+        compute_type=compute_type,
+        num_workers=1,  # Un único hilo inter-op en CTranslate2
+        cpu_threads=CPU_THREADS,
+    )
+    
+    if device == "cuda" and torch.cuda.get_device_capability(0) >= (8, 0):
+        try:
+            model = BatchedInferencePipeline(
+                model=WhisperModel(modelo, flash_attention=True, **kwargs)
+            )
+            # Las builds sin FlashAttention (o con un dtype no soportado) no
+            # fallan al construir el modelo sino en el primer forward
+            warmup(model, batch_size)
+            print("  FlashAttention activado")
+            return model
+        except (RuntimeError, ValueError) as e:
+            print(f"⚠ FlashAttention no disponible ({e}), usando atención estándar")
+    
+    model = BatchedInferencePipeline(model=WhisperModel(modelo, **kwargs))
+    warmup(model, batch_size)
+    return model
+
+
+def fetch_info(url):
+    """Obtiene los metadatos de un video de YouTube sin descargarlo"""
     ydl_opts = {
         'format': 'bestaudio',        
-        'outtmpl': '%(title)s.%(ext)s',
-        'quiet': False,                
+        'quiet': True,                 # Corre en segundo plano
         'noplaylist': True             
     }
 
     with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-        info = ydl.extract_info(url, download=True)
+        info = ydl.extract_info(url, download=False)
     return info
 
 
-def convert_to_wav(info):
-    """Convierte el audio descargado a formato WAV optimizado para Whisper"""
-    input_file = info['requested_downloads'][0]['filepath']
+def decode_audio(url):
+    """
+    Descarga el audio con yt-dlp y lo decodifica con ffmpeg a un array float32
+    mono de 16 kHz, conectando ambos procesos por un pipe (sin archivos en disco).
     
-    # Sanitizar título para evitar errores con caracteres especiales
-    safe_title = re.sub(r'[<>:"/\\|?*]', '_', info['title'])
-    output_file = safe_title + ".wav"
-
+    Args:
+        url (str): URL del video
+    
+    Returns:
+        np.ndarray: Muestras en el rango [-1, 1] listas para Whisper
+    """
     comando = [
         "ffmpeg",
-        "-y",  # Sobrescribir sin preguntar
-        "-i", input_file,
+        "-i", "pipe:0",
+        "-f", "s16le",
         "-ac", "1",
-        "-ar", "16000",
-        "-c:a", "pcm_s16le",
-        "-af", "loudnorm",
-        output_file,
+        "-ar", str(SAMPLE_RATE),
+        "-loglevel", "error",
+        "-",
     ]
 
-    subprocess.run(comando, check=True, capture_output=True)
-    return input_file, output_file
+    # stderr de yt-dlp a un archivo temporal: un pipe sin leer podría bloquearlo
+    with tempfile.TemporaryFile() as errores:
+        descarga = subprocess.Popen(
+            [sys.executable, "-m", "yt_dlp", "-f", "bestaudio", "--no-playlist",
+             "--quiet", "--no-warnings", "-o", "-", url],
+            stdout=subprocess.PIPE,
+            stderr=errores,
+        )
+        try:
+            out = subprocess.run(comando, stdin=descarga.stdout, capture_output=True)
+        finally:
+            # Cerrar nuestro extremo para que yt-dlp reciba SIGPIPE si ffmpeg termina antes
+            descarga.stdout.close()
+            descarga.wait()
+        errores.seek(0)
+        error_descarga = stderr_tail(errores.read())
+
+    # ffmpeg primero: si falla, el error de yt-dlp suele ser solo el SIGPIPE resultante
+    if out.returncode != 0:
+        mensaje = f"ffmpeg terminó con código {out.returncode}: {stderr_tail(out.stderr)}"
+        if descarga.returncode != 0:
+            mensaje += f" (yt-dlp, código {descarga.returncode}: {error_descarga})"
+        raise RuntimeError(mensaje)
+    if descarga.returncode != 0:
+        raise RuntimeError(f"yt-dlp terminó con código {descarga.returncode}: {error_descarga}")
+
+    audio = np.frombuffer(out.stdout, np.int16).astype(np.float32) / 32768.0
+
+    # Normalización RMS simple en lugar de loudnorm (evita una pasada extra de ffmpeg)
+    rms = np.sqrt(np.mean(np.square(audio))) if audio.size else 0.0
+    if rms > 0:
+        peak = np.max(np.abs(audio))
+        audio *= min(TARGET_RMS / rms, 1.0 / peak)
+    return audio
+
+
+def stderr_tail(data, limite=500):
+    """Últimos caracteres de la salida de error de un proceso, para los mensajes y el log"""
+    texto = data.decode(errors="replace").strip()
+    return texto[-limite:] if texto else "sin salida de error"
+
+
+def cache_path(audio, modelo):
+    """Ruta de caché para un audio, según el hash de sus muestras y el modelo usado"""
+    h = hashlib.blake2b(audio.tobytes(), digest_size=16)
+    h.update(modelo.encode())
+    key = h.hexdigest()
+    return os.path.join(CACHE_DIR, f"{key}.npz")
+
+
+def load_cache(path):
+    """Carga los segmentos guardados por save_cache()"""
+    with np.load(path) as data:
+        return [
+            Segmento(float(start), float(end), str(text))
+            for start, end, text in zip(data['start'], data['end'], data['text'])
+        ]
+
+
+def cache_segments(segments, path):
+    """Reemite los segmentos a medida que llegan y los guarda en caché al terminar"""
+    vistos = []
+    for segment in segments:
+        vistos.append(Segmento(segment.start, segment.end, segment.text))
+        yield segment
+    save_cache(path, vistos)
 
 
-def word(result, documento="transcripcion-med.docx"):
+def save_cache(path, segments):
+    """
+    Guarda los segmentos transcritos como arrays NumPy comprimidos.
+    
+    Como save_snapshot(), escribe en un archivo temporal y lo renombra al
+    final: una escritura interrumpida nunca deja un .npz truncado.
+    """
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    parcial = path + ".part"
+    try:
+        with open(parcial, "wb") as f:
+            np.savez_compressed(
+                f,
+                start=np.array([s.start for s in segments], dtype=np.float64),
+                end=np.array([s.end for s in segments], dtype=np.float64),
+                text=np.array([s.text for s in segments], dtype=np.str_),
+            )
+    except BaseException:
+        if os.path.exists(parcial):
+            os.remove(parcial)
+        raise
+    os.replace(parcial, path)
+
+
+def sanitize_title(title):
+    """Reemplaza caracteres no válidos en nombres de archivo"""
+    return re.sub(r'[<>:"/\\|?*]', '_', title)
+
+
+def snapshot_path(info):
+    """
+    Ruta del respaldo JSON Lines de la transcripción de un video.
+    
+    Se identifica por el id del video y no por el título: dos videos con el
+    mismo título nunca comparten respaldo.
+    """
+    return sanitize_title(info['id']) + ".jsonl"
+
+
+def save_snapshot(segments, path):
+    """
+    Escribe los segmentos en JSON Lines a medida que se transcriben.
+    
+    Se escribe en un archivo temporal que solo toma el nombre final cuando la
+    transcripción terminó, así que su existencia implica que está completa.
+    """
+    parcial = path + ".part"
+    try:
+        with open(parcial, "wb") as f:
+            for n, segment in enumerate(segments, 1):
+                f.write(orjson.dumps({"start": float(segment.start), "end": float(segment.end), "text": segment.text}))
+                f.write(b"\n")
+                if n % PROGRESO == 0:
+                    print(f"  {segment.end:.0f} s transcritos")
+    except BaseException:
+        if os.path.exists(parcial):
+            os.remove(parcial)
+        raise
+    os.replace(parcial, path)
+
+
+def load_snapshot(path):
+    """Lee de forma perezosa los segmentos guardados por save_snapshot()"""
+    with open(path, "rb") as f:
+        for linea in f:
+            yield Segmento(**orjson.loads(linea))
+
+
+def word(segments, documento="transcripcion-med.docx", duracion=None):
     """
     Guarda el texto transcrito en un documento Word con timestamps.
     
+    Los segmentos se consumen por lotes, sin cargarlos todos en memoria.
+    
     Args:
-        result (dict): Resultado completo de Whisper con 'text' y 'segments'
+        segments (iterable): Segmentos con .start, .end y .text
         documento (str): Nombre del archivo .docx
+        duracion (float): Duración del audio en segundos; decide de antemano
+            si los timestamps llevan horas. Si se desconoce, se usa "HH:MM:SS"
+    
+    Returns:
+        int: Caracteres transcritos
     """
     doc = Document()
     
     # Título del documento
     doc.add_heading('Transcripción de Audio', 0)
     
-    # Agregar transcripción con timestamps si están disponibles
-    if 'segments' in result:
-        for segment in result['segments']:
-            # Formatear timestamp
-            start_time = format_timestamp(segment['start'])
-            end_time = format_timestamp(segment['end'])
-            
-            # Agregar párrafo con timestamp en negrita y texto normal
-            p = doc.add_paragraph()
-            p.add_run(f"[{start_time} → {end_time}] ").bold = True
-            p.add_run(segment['text'].strip())
-    else:
-        # Fallback: si no hay segments, usar texto completo
-        doc.add_paragraph(result['text'])
+    # Los párrafos van antes de sectPr, que debe ser el último hijo del body
+    sect_pr = doc.element.body.sectPr
+    caracteres = 0
+    
+    # El formato se fija para todo el documento: los lotes llegan de a uno y
+    # no se conoce el último timestamp hasta el final
+    largo = duracion is None or duracion >= 3600
+    
+    segments = iter(segments)
+    while lote := list(islice(segments, DOCX_LOTE)):
+        # Un párrafo por segmento: timestamp en negrita y texto normal.
+        # Se arma el XML del lote y se parsea una sola vez, en lugar de
+        # pasar por add_paragraph()/add_run() en cada segmento.
+        starts = np.fromiter((s.start for s in lote), np.float64, len(lote))
+        ends = np.fromiter((s.end for s in lote), np.float64, len(lote))
+        starts = format_timestamps(starts, largo)
+        ends = format_timestamps(ends, largo)
+        textos = [s.text.strip() for s in lote]
+        parrafos = "".join(
+            '<w:p>'
+            '<w:r><w:rPr><w:b/></w:rPr><w:t xml:space="preserve">'
+            f'[{start_time} → {end_time}] </w:t></w:r>'
+            f'<w:r><w:t xml:space="preserve">{escape(texto)}</w:t></w:r>'
+            '</w:p>'
+            for texto, start_time, end_time in zip(textos, starts, ends)
+        )
+        fragmento = parse_xml(f'<w:body {nsdecls("w")}>{parrafos}</w:body>')
+        for p in list(fragmento):
+            sect_pr.addprevious(p)
+        
+        caracteres += sum(len(t) for t in textos)
     
     doc.save(documento)
     print(f"✓ Guardado en: {documento}")
+    return caracteres
 
 
-def format_timestamp(seconds):
+def format_timestamps(seconds, largo):
     """
-    Convierte segundos a formato timestamp legible.
+    Convierte un array de segundos a timestamps legibles en una sola pasada.
     
     Args:
-        seconds (float): Tiempo en segundos
+        seconds (np.ndarray): Tiempos en segundos
+        largo (bool): Usar "HH:MM:SS" en lugar de "MM:SS"; quien llama lo
+            decide una vez para que todo el documento use el mismo formato
     
     Returns:
-        str: Timestamp en formato "HH:MM:SS" o "MM:SS"
+        list[str]: Timestamps en el formato elegido
     """
-    hours = int(seconds // 3600)
-    minutes = int((seconds % 3600) // 60)
-    secs = int(seconds % 60)
+    total = seconds.astype(np.int64)
     
-    if hours > 0:
-        return f"{hours:02d}:{minutes:02d}:{secs:02d}"
+    if largo:
+        hours, rem = np.divmod(total, 3600)
+        minutes, secs = np.divmod(rem, 60)
+        return [f"{h:02d}:{m:02d}:{s:02d}" for h, m, s in zip(hours.tolist(), minutes.tolist(), secs.tolist())]
     else:
-        return f"{minutes:02d}:{secs:02d}"
+        # Los minutos no se truncan a la hora: nunca se pierde tiempo del timestamp
+        minutes, secs = np.divmod(total, 60)
+        return [f"{m:02d}:{s:02d}" for m, s in zip(minutes.tolist(), secs.tolist())]
 
 
-def clean(input_file, output_file):
-    """Elimina archivos temporales de forma segura"""
-    archivos_eliminados = []
-    
-    for archivo in [input_file, output_file]:
-        if archivo and os.path.exists(archivo):
-            try:
-                os.remove(archivo)
-                archivos_eliminados.append(os.path.basename(archivo))
-            except OSError as e:
-                print(f"⚠ No se pudo eliminar {archivo}: {e}")
-    
-    if archivos_eliminados:
-        print(f"🗑️  Eliminados: {', '.join(archivos_eliminados)}")
-
-
-def registro(info, url, output_csv="transcriptions_log.csv"):
-    """Registra el resultado del procesamiento en un CSV"""
+def registro(info, url):
+    """Acumula el resultado del procesamiento; se escribe con guardar_registro()"""
     if isinstance(info, Exception):
         row = {
             "title": "N/A",
@@ -257,30 +587,43 @@ def registro(info, url, output_csv="transcriptions_log.csv"):
             "status": f"Error: {str(info)}"
         }
     else:
-        # Formatear fecha: de "20081010" a "2008-10-10"
-        upload_date = info.get('upload_date', 'N/A')
-        if upload_date != 'N/A' and len(upload_date) == 8:
-            upload_date = f"{upload_date[0:4]}-{upload_date[4:6]}-{upload_date[6:8]}"
-        
-        # Formatear duración: de segundos a "HH:MM:SS"
-        duration = info.get('duration', 'N/A')
-        if isinstance(duration, (int, float)):
-            hours = int(duration // 3600)
-            minutes = int((duration % 3600) // 60)
-            seconds = int(duration % 60)
-            duration = f"{hours:02d}:{minutes:02d}:{seconds:02d}"
-        
+        # Fecha y duración se formatean en bloque en guardar_registro()
         row = {
             "title": info.get('title', 'N/A'),
-            "upload_date": upload_date,
-            "duration": duration,
+            "upload_date": info.get('upload_date', 'N/A'),
+            "duration": info.get('duration', 'N/A'),
             "view_count": info.get('view_count', 'N/A'),
             "channel": info.get('uploader', 'N/A'),
             "URL": url,
             "status": "Success",
         }
     
-    df = pd.DataFrame([row])
+    _rows.append(row)
+
+
+def guardar_registro(output_csv="transcriptions_log.csv"):
+    """Escribe en el CSV todas las filas acumuladas por registro()"""
+    if not _rows:
+        return
+
+    df = pd.DataFrame(_rows)
+    _rows.clear()
+
+    # Formatear fecha: de "20081010" a "2008-10-10"
+    fechas = pd.to_datetime(df['upload_date'], format="%Y%m%d", errors="coerce")
+    df['upload_date'] = fechas.dt.strftime("%Y-%m-%d").fillna('N/A')
+
+    # Formatear duración: de segundos a "HH:MM:SS"
+    segundos = pd.to_numeric(df['duration'], errors="coerce")
+    validos = segundos.notna()
+    total = segundos[validos].astype("int64")
+    df['duration'] = 'N/A'
+    df.loc[validos, 'duration'] = (
+        (total // 3600).astype(str).str.zfill(2) + ":"
+        + (total % 3600 // 60).astype(str).str.zfill(2) + ":"
+        + (total % 60).astype(str).str.zfill(2)
+    )
+
     write_header = not os.path.exists(output_csv)
 
     df.to_csv(